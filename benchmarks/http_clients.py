@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import ntu_css.add_drop
+import ntu_css.http
+import ntu_css.lite_http
+import ntu_css.something
+
+BODY = (
+    "<html><body><div id='div-main'><h3><font>加選成功</font></h3></div></body></html>"
+).encode()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    while True:
+        request_line = await reader.readline()
+        if not request_line:
+            break
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        target = request_line.split(b" ")[1]
+        if target.startswith(b"/login"):
+            head = (
+                b"HTTP/1.1 302 Found\r\nLocation: /coursetake2/coutake/mainscr\r\n"
+                b"Set-Cookie: session=1; Path=/\r\nContent-Length: 0\r\n\r\n"
+            )
+            writer.write(head)
+        else:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+                + BODY
+            )
+        await writer.drain()
+    writer.close()
+
+
+async def run(client: ntu_css.http.Client, requests: int, concurrency: int):
+    session_info = ntu_css.something.SessionInfo(regno="B00000000", lang="tw", extid="")
+    params = ntu_css.add_drop.add_course_params(
+        session_info, ntu_css.add_drop.Type1Course(serial_number="97001")
+    )
+    response = await client.request("GET", "/login", follow_redirects=True)
+    assert response.url().endswith("/coursetake2/coutake/mainscr")
+    assert [cookie.name for cookie in client.cookies()] == ["session"]
+
+    async def worker(n: int):
+        for _ in range(n):
+            response = await client.request(
+                "GET", "/coursetake2/coutake/add-cou", params=params
+            )
+            response.raise_for_status()
+            assert "加選成功" in response.text()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/"
+
+    async with httpx.AsyncClient(base_url=base_url) as httpx_client:
+        elapsed = await run(
+            ntu_css.http.HttpxClient(httpx_client), args.requests, args.concurrency
+        )
+    print(f"HttpxClient: {args.requests / elapsed:.0f} requests/s")
+
+    lite_client = ntu_css.lite_http.LiteClient(base=base_url)
+    elapsed = await run(lite_client, args.requests, args.concurrency)
+    await lite_client.aclose()
+    print(f"LiteClient: {args.requests / elapsed:.0f} requests/s")
+
+    await asyncio.sleep(0.1)
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
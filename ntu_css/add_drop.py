@@ -5,6 +5,9 @@ import urllib.parse
 
 import lxml.html
 
+import ntu_css.catalog
+import ntu_css.deadlines
+import ntu_css.exceptions
 import ntu_css.http
 import ntu_css.single_sign_on
 import ntu_css.something
@@ -58,9 +61,14 @@ class CourseSelectionListItem:
 def table_row_to_course_selection_list_item(
     table_row: lxml.html.HtmlElement, table_header_text_contents: tuple[str, ...]
 ):
-    table_data_cells = ntu_css.utils.check_table_row_for_data(
-        table_row, table_header_text_contents
+    return table_data_cells_to_course_selection_list_item(
+        ntu_css.utils.check_table_row_for_data(table_row, table_header_text_contents)
     )
+
+
+def table_data_cells_to_course_selection_list_item(
+    table_data_cells: list[lxml.html.HtmlElement],
+):
     texts = [ntu_css.utils.assert_str(text) for text in table_data_cells[2].itertext()]
     assert len(texts) == 2
     return CourseSelectionListItem(
@@ -86,6 +94,19 @@ def table_row_to_course_selection_list_item(
     )
 
 
+class ErrorMessageFromServer(ntu_css.exceptions.ServerMessageError):
+    pass
+
+
+def message_text(document: lxml.html.HtmlElement):
+    elements = ntu_css.utils.assert_list_of_html_element(
+        document.xpath('//*[@id="div-main"]')
+    )
+    if len(elements) != 1:
+        elements = [document]
+    return " ".join(ntu_css.utils.text_content(elements[0]).split())
+
+
 @dataclasses.dataclass
 class Type1Course:
     serial_number: str
@@ -101,35 +122,150 @@ def check_text_content(document: lxml.html.HtmlElement, path: str, text_content:
     assert ntu_css.utils.text_content(element) == text_content
 
 
+def add_course_params(session_info: ntu_css.something.SessionInfo, course: Type1Course):
+    if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
+        sure = "確定選課"
+    elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
+        sure = "Confirm registration"
+    else:
+        assert False
+    return (
+        ("serno", course.serial_number),
+        ("cougrp", ""),
+        ("opFld", "serno"),
+        ("cou_no", ""),
+        ("cou_cls", ""),
+        ("couid_1", ""),
+        ("couid_2", ""),
+        ("couid_cls", ""),
+        ("authno", ""),
+        ("regno", session_info.regno),
+        ("extid", session_info.extid),
+        ("txtRank", ""),
+        ("sure", sure),
+        ("lang", session_info.lang),
+    )
+
+
+def check_add_course_response(
+    response: ntu_css.http.Response,
+    session_info: ntu_css.something.SessionInfo,
+    course: Type1Course,
+):
+    if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
+        serial_number_text = "流水號："
+    elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
+        serial_number_text = "Serial number："
+    else:
+        assert False
+    response.raise_for_status()
+    document = ntu_css.utils.document_from_string(response.text())
+    headings = ntu_css.utils.assert_list_of_html_element(
+        document.xpath('//*[@id="div-main"]/h3/font')
+    )
+    if not (
+        len(headings) == 1 and ntu_css.utils.text_content(headings[0]) == "加選成功"
+    ):
+        raise ErrorMessageFromServer(message_text(document))
+    check_text_content(
+        document,
+        '//*[@id="div-main"]/table/tr[2]/td[1]/center/table/tr[1]/th/font',
+        serial_number_text,
+    )
+    check_text_content(
+        document,
+        '//*[@id="div-main"]/table/tr[2]/td[1]/center/table/tr[1]/td/font',
+        course.serial_number,
+    )
+
+
+def delete_course_params(
+    session_info: ntu_css.something.SessionInfo, serial_number: str
+):
+    if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
+        sure = "確定退選"
+    elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
+        sure = "Confirm de-registration"
+    else:
+        assert False
+    return (
+        ("serno", serial_number),
+        ("regno", session_info.regno),
+        ("extid", session_info.extid),
+        ("sure", sure),
+        ("lang", session_info.lang),
+    )
+
+
+def check_delete_course_response(
+    response: ntu_css.http.Response,
+    session_info: ntu_css.something.SessionInfo,
+    serial_number: str,
+):
+    if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
+        student_id_number_text = "學號： "
+        serial_number_text = "退選科目流水號:"
+        main_text = ["\r\n", " 完成退選", " ", "\n\n"]
+    elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
+        student_id_number_text = "Student ID number:  "
+        serial_number_text = "Serial number of the de-registered course:"
+        main_text = ["\r\n", " De-registration completed.", " ", "\n\n"]
+    else:
+        assert False
+    response.raise_for_status()
+    document = ntu_css.utils.document_from_string(response.text())
+    if document.xpath('//*[@id="div-main"]/text()') != main_text:
+        raise ErrorMessageFromServer(message_text(document))
+    check_text_content(
+        document, '//*[@id="div-main"]/table/tr[1]/td[1]', student_id_number_text
+    )
+    check_text_content(
+        document, '//*[@id="div-main"]/table/tr[1]/td[2]', session_info.regno
+    )
+    check_text_content(
+        document, '//*[@id="div-main"]/table/tr[2]/td[1]', serial_number_text
+    )
+    check_text_content(document, '//*[@id="div-main"]/table/tr[2]/td[2]', serial_number)
+
+
+def check_login_response(
+    response: ntu_css.http.Response, http_client: ntu_css.http.Client
+):
+    ntu_css.utils.check_response_url(
+        response=response,
+        http_client=http_client,
+        path="/coursetake2/user/coursetake2",
+        query_keys={"regno", "lang"},
+    )
+    m = re.fullmatch(
+        r"""<script type="text/javascript">\r\nwindow\.location\.href = \'(/coursetake2/user/chk-sess\?sess=[0-9a-f]{32}[0-9A-Z]{9}[0-9]{12}&language=)\';\r\n</script>""",
+        response.text(),
+    )
+    assert m is not None
+    return urllib.parse.urljoin(response.url(), ntu_css.utils.assert_str(m.group(1)))
+
+
 @dataclasses.dataclass
 class CourseSelectionClient:
     session_info: ntu_css.something.SessionInfo | None
 
     http_client: ntu_css.http.Client
 
+    layout_validation_cache: ntu_css.utils.LayoutValidationCache | None = None
+
+    session_broker: ntu_css.single_sign_on.SessionBroker | None = None
+
+    catalog: ntu_css.catalog.Catalog | None = None
+
     async def login(self, username: str, password: str):
-        response = await self.http_client.request(
-            "GET", "/coursetake2/login.aspx", follow_redirects=True
-        )
-        request = ntu_css.single_sign_on.login(
-            response=response, username=username, password=password
-        )
-        response = await self.http_client.request(
-            request.method, request.url, data=request.data, follow_redirects=True
-        )
-        response.raise_for_status()
-        ntu_css.utils.check_response_url(
-            response=response,
+        url = await ntu_css.single_sign_on.login_via(
             http_client=self.http_client,
-            path="/coursetake2/user/coursetake2",
-            query_keys={"regno", "lang"},
-        )
-        m = re.fullmatch(
-            r"""<script type="text/javascript">\r\nwindow\.location\.href = \'(/coursetake2/user/chk-sess\?sess=[0-9a-f]{32}[0-9A-Z]{9}[0-9]{12}&language=)\';\r\n</script>""",
-            response.text(),
+            url="/coursetake2/login.aspx",
+            username=username,
+            password=password,
+            check=lambda response: check_login_response(response, self.http_client),
+            session_broker=self.session_broker,
         )
-        assert m is not None
-        url = urllib.parse.urljoin(response.url(), ntu_css.utils.assert_str(m.group(1)))
         response = await self.http_client.request("GET", url, follow_redirects=True)
         response.raise_for_status()
         query = ntu_css.utils.check_response_url(
@@ -158,105 +294,71 @@ class CourseSelectionClient:
         )
         response.raise_for_status()
         document = ntu_css.utils.document_from_string(response.text())
-        ntu_css.utils.check_table_headers(
-            table_row=ntu_css.utils.xpath_only_one_html_element(
-                document, '//*[@id="div-main"]/center/table/tr'
-            ),
-            path="th",
-            text_contents=table_header_text_contents,
-        )
         table_rows = ntu_css.utils.assert_list_of_html_element(
             document.xpath('//*[@id="div-main"]/center/table/tbody[1]/tr')
         )
-        for table_row in table_rows:
-            yield table_row_to_course_selection_list_item(
-                table_row=table_row,
-                table_header_text_contents=table_header_text_contents,
+        for table_data_cells in ntu_css.utils.check_table(
+            table_header_row=ntu_css.utils.xpath_only_one_html_element(
+                document, '//*[@id="div-main"]/center/table/tr'
+            ),
+            path="th",
+            table_rows=table_rows,
+            table_header_text_contents=table_header_text_contents,
+            layout_validation_cache=self.layout_validation_cache,
+        ):
+            yield ntu_css.catalog.record(
+                self.catalog,
+                table_data_cells_to_course_selection_list_item(table_data_cells),
             )
 
     async def add_course(self, course: Type1Course):
-        ntu_css.utils.check_serial_number(course.serial_number)
+        ntu_css.catalog.check_serial_number(self.catalog, course.serial_number)
         session_info = copy_session_info(self.session_info)
-        if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
-            sure = "確定選課"
-            serial_number_text = "流水號："
-        elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
-            sure = "Confirm registration"
-            serial_number_text = "Serial number："
-        else:
-            assert False
         response = await self.http_client.request(
             "GET",
             "/coursetake2/coutake/add-cou",
-            params=(
-                ("serno", course.serial_number),
-                ("cougrp", ""),
-                ("opFld", "serno"),
-                ("cou_no", ""),
-                ("cou_cls", ""),
-                ("couid_1", ""),
-                ("couid_2", ""),
-                ("couid_cls", ""),
-                ("authno", ""),
-                ("regno", session_info.regno),
-                ("extid", session_info.extid),
-                ("txtRank", ""),
-                ("sure", sure),
-                ("lang", session_info.lang),
-            ),
-        )
-        response.raise_for_status()
-        document = ntu_css.utils.document_from_string(response.text())
-        check_text_content(document, '//*[@id="div-main"]/h3/font', "加選成功")
-        check_text_content(
-            document,
-            '//*[@id="div-main"]/table/tr[2]/td[1]/center/table/tr[1]/th/font',
-            serial_number_text,
-        )
-        check_text_content(
-            document,
-            '//*[@id="div-main"]/table/tr[2]/td[1]/center/table/tr[1]/td/font',
-            course.serial_number,
+            params=add_course_params(session_info, course),
         )
+        check_add_course_response(response, session_info, course)
 
     async def delete_course(self, serial_number: str):
         ntu_css.utils.check_serial_number(serial_number)
         session_info = copy_session_info(self.session_info)
-        if session_info.lang == ntu_css.something.SESSION_INFO_LANG_CHINESE:
-            sure = "確定退選"
-            student_id_number_text = "學號： "
-            serial_number_text = "退選科目流水號:"
-            main_text = ["\r\n", " 完成退選", " ", "\n\n"]
-        elif session_info.lang == ntu_css.something.SESSION_INFO_LANG_ENGLISH:
-            sure = "Confirm de-registration"
-            student_id_number_text = "Student ID number:  "
-            serial_number_text = "Serial number of the de-registered course:"
-            main_text = ["\r\n", " De-registration completed.", " ", "\n\n"]
-        else:
-            assert False
         response = await self.http_client.request(
             "GET",
             "/coursetake2/coutake/del-cou",
-            params=(
-                ("serno", serial_number),
-                ("regno", session_info.regno),
-                ("extid", session_info.extid),
-                ("sure", sure),
-                ("lang", session_info.lang),
-            ),
+            params=delete_course_params(session_info, serial_number),
         )
-        response.raise_for_status()
-        document = ntu_css.utils.document_from_string(response.text())
-        check_text_content(
-            document, '//*[@id="div-main"]/table/tr[1]/td[1]', student_id_number_text
-        )
-        check_text_content(
-            document, '//*[@id="div-main"]/table/tr[1]/td[2]', session_info.regno
-        )
-        check_text_content(
-            document, '//*[@id="div-main"]/table/tr[2]/td[1]', serial_number_text
-        )
-        check_text_content(
-            document, '//*[@id="div-main"]/table/tr[2]/td[2]', serial_number
+        check_delete_course_response(response, session_info, serial_number)
+
+    async def swap_course(self, old_serial_number: str, new_course: Type1Course):
+        ntu_css.utils.check_serial_number(old_serial_number)
+        ntu_css.catalog.check_serial_number(self.catalog, new_course.serial_number)
+        session_info = copy_session_info(self.session_info)
+        delete_params = delete_course_params(session_info, old_serial_number)
+        add_params = add_course_params(session_info, new_course)
+        response = await self.http_client.request(
+            "GET", "/coursetake2/coutake/del-cou", params=delete_params
         )
-        assert document.xpath('//*[@id="div-main"]/text()') == main_text
+        check_delete_course_response(response, session_info, old_serial_number)
+        try:
+            response = await self.http_client.request(
+                "GET", "/coursetake2/coutake/add-cou", params=add_params
+            )
+            check_add_course_response(response, session_info, new_course)
+        except Exception as e:
+            error = e
+        else:
+            return
+        old_course = Type1Course(serial_number=old_serial_number)
+        try:
+            with ntu_css.deadlines.detached():
+                response = await self.http_client.request(
+                    "GET",
+                    "/coursetake2/coutake/add-cou",
+                    params=add_course_params(session_info, old_course),
+                )
+            check_add_course_response(response, session_info, old_course)
+        except Exception as rollback_error:
+            error.__context__ = rollback_error
+        raise error
@@ -0,0 +1,79 @@
+import dataclasses
+import sys
+from typing import Any, TypeVar
+
+import ntu_css.exceptions
+import ntu_css.utils
+
+T = TypeVar("T")
+
+
+class UnknownSerialNumber(ntu_css.exceptions.Error):
+    pass
+
+
+@dataclasses.dataclass
+class Course:
+    serial_number: str
+    curriculum_number: str | None = None
+    curriculum_identity_number: str | None = None
+    class_: str | None = None
+    course_name: str | None = None
+    credits: str | None = None
+    instructor: str | None = None
+    course_schedule: str | None = None
+
+
+COURSE_FIELD_NAMES = frozenset(field.name for field in dataclasses.fields(Course))
+
+FIELD_NAME_ALIASES = {"curriculum_name": "course_name", "course_class": "class_"}
+
+
+def intern_strings(o: T) -> T:
+    for field in dataclasses.fields(o):
+        value = getattr(o, field.name)
+        if isinstance(value, str):
+            setattr(o, field.name, sys.intern(str(value)))
+    return o
+
+
+@dataclasses.dataclass
+class Catalog:
+    courses: dict[str, Course] = dataclasses.field(default_factory=dict)
+    reject_unknown: bool = False
+
+    def record(self, item: Any):
+        intern_strings(item)
+        course = self.courses.get(item.serial_number)
+        if course is None:
+            course = Course(serial_number=item.serial_number)
+            self.courses[item.serial_number] = course
+        for field in dataclasses.fields(item):
+            name = FIELD_NAME_ALIASES.get(field.name, field.name)
+            if name in COURSE_FIELD_NAMES:
+                setattr(course, name, getattr(item, field.name))
+        return item
+
+    def get(self, serial_number: str):
+        return self.courses.get(serial_number)
+
+    def check_serial_number(self, serial_number: str):
+        ntu_css.utils.check_serial_number(serial_number)
+        if self.reject_unknown and serial_number not in self.courses:
+            raise UnknownSerialNumber(serial_number)
+
+
+CATALOG = Catalog()
+
+
+def record(catalog: Catalog | None, item: T) -> T:
+    if catalog is not None:
+        catalog.record(item)
+    return item
+
+
+def check_serial_number(catalog: Catalog | None, serial_number: str):
+    if catalog is None:
+        ntu_css.utils.check_serial_number(serial_number)
+    else:
+        catalog.check_serial_number(serial_number)
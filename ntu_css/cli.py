@@ -0,0 +1,278 @@
+import argparse
+import dataclasses
+import getpass
+import json
+import os
+import shlex
+import sys
+from typing import Any
+
+import ntu_css.something
+
+SYSTEM_STAGE2 = "stage2"
+SYSTEM_ADD_DROP = "add-drop"
+
+RESULT_TABLES = ("result", "operation-log", "failed-courses")
+
+
+def print_record(o: Any):
+    if dataclasses.is_dataclass(o):
+        o = dataclasses.asdict(o)
+    print(json.dumps(o, ensure_ascii=False), flush=True)
+
+
+def get_catalog():
+    import ntu_css.catalog
+
+    return ntu_css.catalog.CATALOG
+
+
+@dataclasses.dataclass
+class Session:
+    username: str
+    password: str
+    system: str
+    base_url: str
+    http_clients: list[Any] = dataclasses.field(default_factory=list)
+    session_broker: Any = None
+    course_selection_client: Any = None
+    results_client: Any = None
+
+    def get_session_broker(self):
+        if self.session_broker is None:
+            import ntu_css.single_sign_on
+
+            self.session_broker = ntu_css.single_sign_on.SessionBroker()
+        return self.session_broker
+
+    def new_http_client(self, **kwargs):
+        import httpx
+
+        import ntu_css.http
+
+        client = httpx.AsyncClient(**kwargs)
+        self.http_clients.append(client)
+        return ntu_css.http.HttpxClient(client)
+
+    async def get_course_selection_client(self):
+        if self.course_selection_client is not None:
+            return self.course_selection_client
+        http_client = self.new_http_client(base_url=self.base_url)
+        if self.system == SYSTEM_STAGE2:
+            import ntu_css.stage2
+
+            session_info = await ntu_css.stage2.LoginClient(
+                http_client, session_broker=self.get_session_broker()
+            ).login(username=self.username, password=self.password)
+            client = ntu_css.stage2.CourseSelectionClient(
+                session_info, http_client, catalog=get_catalog()
+            )
+        elif self.system == SYSTEM_ADD_DROP:
+            import ntu_css.add_drop
+
+            client = ntu_css.add_drop.CourseSelectionClient(
+                None,
+                http_client,
+                session_broker=self.get_session_broker(),
+                catalog=get_catalog(),
+            )
+            await client.login(username=self.username, password=self.password)
+        else:
+            assert False
+        self.course_selection_client = client
+        return client
+
+    async def get_results_client(self):
+        if self.results_client is not None:
+            return self.results_client
+        import ntu_css.results
+
+        client = ntu_css.results.Client(
+            self.new_http_client(),
+            session_broker=self.get_session_broker(),
+            catalog=get_catalog(),
+        )
+        await client.login(username=self.username, password=self.password)
+        self.results_client = client
+        return client
+
+    async def aclose(self):
+        for client in self.http_clients:
+            await client.aclose()
+
+
+async def login(session: Session, args: argparse.Namespace):
+    client = await session.get_course_selection_client()
+    print_record(client.session_info)
+
+
+async def list_courses(session: Session, args: argparse.Namespace):
+    client = await session.get_course_selection_client()
+    async for item in client.list_courses():
+        print_record(item)
+
+
+async def add_course(session: Session, args: argparse.Namespace):
+    import ntu_css.utils
+
+    ntu_css.utils.check_serial_number(args.serial_number)
+    if session.system == SYSTEM_STAGE2:
+        import ntu_css.stage2
+
+        if args.priority is None:
+            raise ValueError("--priority is required for stage2")
+        ntu_css.stage2.check_priority(args.priority)
+    client = await session.get_course_selection_client()
+    if session.system == SYSTEM_STAGE2:
+        await client.add_course(args.serial_number, args.priority)
+    else:
+        import ntu_css.add_drop
+
+        await client.add_course(ntu_css.add_drop.Type1Course(args.serial_number))
+    print_record({"added": args.serial_number})
+
+
+async def delete_course(session: Session, args: argparse.Namespace):
+    import ntu_css.utils
+
+    ntu_css.utils.check_serial_number(args.serial_number)
+    client = await session.get_course_selection_client()
+    await client.delete_course(args.serial_number)
+    print_record({"deleted": args.serial_number})
+
+
+async def results(session: Session, args: argparse.Namespace):
+    import ntu_css.results
+
+    client = await session.get_results_client()
+    kind = ntu_css.results.ResultKind(args.kind)
+    if args.table == "result":
+        items = client.get_result(kind)
+    elif args.table == "operation-log":
+        items = client.get_operation_log(kind)
+    elif args.table == "failed-courses":
+        items = client.get_failed_courses(kind)
+    else:
+        assert False
+    async for item in items:
+        print_record(item)
+
+
+async def run_operation(
+    session: Session, args: argparse.Namespace, seconds: float | None
+):
+    if seconds is None:
+        await args.func(session, args)
+        return
+    import ntu_css.deadlines
+
+    with ntu_css.deadlines.deadline(seconds):
+        await args.func(session, args)
+
+
+async def batch(session: Session, args: argparse.Namespace):
+    parser = make_operation_parser()
+    failed = 0
+    for line in args.job_file:
+        try:
+            argv = shlex.split(line, comments=True)
+            if not argv:
+                continue
+            try:
+                job_args = parser.parse_args(argv)
+            except SystemExit:
+                raise ValueError("invalid job line") from None
+            await run_operation(session, job_args, args.deadline)
+        except Exception as e:
+            failed += 1
+            print(f"{line.strip()}: {type(e).__name__}: {e}", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+def add_operation_subparsers(subparsers: Any):
+    parser = subparsers.add_parser("login", help="log in and print session info")
+    parser.set_defaults(func=login)
+
+    parser = subparsers.add_parser("list", help="list selected courses")
+    parser.set_defaults(func=list_courses)
+
+    parser = subparsers.add_parser("add", help="add a course")
+    parser.add_argument("serial_number")
+    parser.add_argument("--priority", type=int, help="priority (stage2 only)")
+    parser.set_defaults(func=add_course)
+
+    parser = subparsers.add_parser("delete", help="delete a course")
+    parser.add_argument("serial_number")
+    parser.set_defaults(func=delete_course)
+
+    parser = subparsers.add_parser("results", help="query allocation results")
+    parser.add_argument("--kind", choices=("1", "2"), default="1")
+    parser.add_argument("--table", choices=RESULT_TABLES, default=RESULT_TABLES[0])
+    parser.set_defaults(func=results)
+
+
+def make_operation_parser():
+    parser = argparse.ArgumentParser(
+        prog="ntu-css batch", add_help=False, exit_on_error=False
+    )
+    subparsers = parser.add_subparsers(required=True)
+    add_operation_subparsers(subparsers)
+    return parser
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="ntu-css")
+    parser.add_argument(
+        "--username",
+        default=os.environ.get("NTU_CSS_USERNAME"),
+        help="defaults to $NTU_CSS_USERNAME",
+    )
+    parser.add_argument(
+        "--system", choices=(SYSTEM_STAGE2, SYSTEM_ADD_DROP), default=SYSTEM_STAGE2
+    )
+    parser.add_argument("--base-url", default=ntu_css.something.BASE_URLS[1])
+    parser.add_argument(
+        "--deadline", type=float, help="time budget in seconds for each operation"
+    )
+    subparsers = parser.add_subparsers(required=True)
+    add_operation_subparsers(subparsers)
+    parser_batch = subparsers.add_parser(
+        "batch", help="run one operation per line of a job file in one process"
+    )
+    parser_batch.add_argument("job_file", type=argparse.FileType("r"))
+    parser_batch.set_defaults(func=batch)
+    return parser
+
+
+async def run(args: argparse.Namespace):
+    if args.username is None:
+        raise SystemExit("--username or $NTU_CSS_USERNAME is required")
+    password = os.environ.get("NTU_CSS_PASSWORD")
+    if password is None:
+        password = getpass.getpass()
+    session = Session(
+        username=args.username,
+        password=password,
+        system=args.system,
+        base_url=args.base_url,
+    )
+    try:
+        if args.func is batch:
+            await batch(session, args)
+        else:
+            await run_operation(session, args, args.deadline)
+    finally:
+        await session.aclose()
+
+
+def main(argv: list[str] | None = None):
+    args = make_parser().parse_args(argv)
+
+    import asyncio
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+import contextvars
+import inspect
+import time
+from collections.abc import Awaitable
+from typing import TypeVar
+
+import ntu_css.exceptions
+
+T = TypeVar("T")
+
+current_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "current_deadline", default=None
+)
+
+
+class DeadlineExceeded(ntu_css.exceptions.Error):
+    pass
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    when = time.monotonic() + seconds
+    outer = current_deadline.get()
+    if outer is not None:
+        when = min(when, outer)
+    token = current_deadline.set(when)
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+@contextlib.contextmanager
+def detached():
+    token = current_deadline.set(None)
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def remaining():
+    when = current_deadline.get()
+    if when is None:
+        return None
+    return when - time.monotonic()
+
+
+async def bounded(awaitable: Awaitable[T]) -> T:
+    timeout = remaining()
+    if timeout is None:
+        return await awaitable
+    if timeout <= 0:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("deadline exceeded") from None
@@ -1,2 +1,48 @@
+import dataclasses
+import enum
+
+
 class Error(Exception):
     pass
+
+
+class ErrorKind(enum.Enum):
+    course_full = "course_full"
+    time_conflict = "time_conflict"
+    not_eligible = "not_eligible"
+    session_expired = "session_expired"
+    unknown = "unknown"
+
+
+ERROR_KIND_KEYWORDS = (
+    (
+        ErrorKind.session_expired,
+        ("逾時", "重新登入", "請先登入", "timed out", "expired", "log in again"),
+    ),
+    (ErrorKind.course_full, ("額滿", "已滿", "人數上限", "full")),
+    (ErrorKind.time_conflict, ("衝堂", "conflict")),
+    (
+        ErrorKind.not_eligible,
+        ("限修", "資格", "不得", "不能", "不可", "not eligible", "not allowed"),
+    ),
+)
+
+
+def classify_message(message: str):
+    message = message.lower()
+    for kind, keywords in ERROR_KIND_KEYWORDS:
+        if any(keyword in message for keyword in keywords):
+            return kind
+    return ErrorKind.unknown
+
+
+@dataclasses.dataclass(eq=False)
+class ServerMessageError(Error):
+    message: str
+
+    @property
+    def kind(self):
+        return classify_message(self.message)
+
+    def __str__(self):
+        return repr(self.message)
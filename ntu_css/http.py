@@ -1,9 +1,12 @@
 import abc
 import dataclasses
+from collections.abc import Iterable
 from typing import Any
 
 import httpx
 
+import ntu_css.deadlines
+
 
 @dataclasses.dataclass
 class Request:
@@ -12,6 +15,14 @@ class Request:
     data: Any
 
 
+@dataclasses.dataclass
+class Cookie:
+    name: str
+    value: str
+    domain: str
+    path: str
+
+
 class Response(abc.ABC):
     @abc.abstractmethod
     def raise_for_status(self) -> None:
@@ -29,6 +40,9 @@ class Response(abc.ABC):
     def url(self) -> str:
         raise NotImplementedError
 
+    def status(self) -> int | None:
+        return None
+
 
 class Client(abc.ABC):
     @abc.abstractmethod
@@ -47,6 +61,12 @@ class Client(abc.ABC):
     ) -> Response:
         raise NotImplementedError
 
+    def cookies(self) -> list[Cookie]:
+        return []
+
+    def set_cookies(self, cookies: Iterable[Cookie]) -> None:
+        pass
+
 
 @dataclasses.dataclass
 class HttpxResponse(Response):
@@ -61,6 +81,9 @@ class HttpxResponse(Response):
     def text(self):
         return self.response.text
 
+    def status(self):
+        return self.response.status_code
+
     def url(self):
         return str(self.response.url)
 
@@ -82,7 +105,50 @@ class HttpxClient(Client):
         follow_redirects: bool = False,
     ):
         return HttpxResponse(
-            await self.client.request(
-                method, url, data=data, params=params, follow_redirects=follow_redirects
+            await ntu_css.deadlines.bounded(
+                self.client.request(
+                    method,
+                    url,
+                    data=data,
+                    params=params,
+                    follow_redirects=follow_redirects,
+                    timeout=self.timeout(),
+                )
             )
         )
+
+    def timeout(self):
+        remaining = ntu_css.deadlines.remaining()
+        if remaining is None:
+            return httpx.USE_CLIENT_DEFAULT
+        remaining = max(remaining, 0)
+        timeout = self.client.timeout
+        return httpx.Timeout(
+            **{
+                name: remaining if value is None else min(value, remaining)
+                for (name, value) in (
+                    ("connect", timeout.connect),
+                    ("read", timeout.read),
+                    ("write", timeout.write),
+                    ("pool", timeout.pool),
+                )
+            }
+        )
+
+    def cookies(self):
+        return [
+            Cookie(
+                name=cookie.name,
+                value=cookie.value,
+                domain=cookie.domain,
+                path=cookie.path,
+            )
+            for cookie in self.client.cookies.jar
+            if cookie.value is not None
+        ]
+
+    def set_cookies(self, cookies: Iterable[Cookie]):
+        for cookie in cookies:
+            self.client.cookies.set(
+                cookie.name, cookie.value, domain=cookie.domain, path=cookie.path
+            )
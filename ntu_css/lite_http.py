@@ -0,0 +1,375 @@
+import asyncio
+import dataclasses
+import email.message
+import functools
+import http.cookiejar
+import ssl
+import urllib.parse
+import urllib.request
+import zlib
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+import ntu_css.deadlines
+import ntu_css.exceptions
+import ntu_css.http
+import ntu_css.scheduler
+
+MAX_REDIRECTS = 20
+
+REDIRECT_STATUS_CODES = frozenset((301, 302, 303, 307, 308))
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class HTTPStatusError(ntu_css.exceptions.Error):
+    pass
+
+
+class RemoteProtocolError(ntu_css.exceptions.Error):
+    pass
+
+
+@functools.lru_cache(maxsize=4096)
+def quote(s: str):
+    return urllib.parse.quote_plus(s)
+
+
+@dataclasses.dataclass
+class QueryTemplate:
+    keys: tuple[str, ...]
+    prefixes: tuple[str, ...]
+
+    def render(self, values: Iterable[str]):
+        return "".join(
+            prefix + quote(value)
+            for (prefix, value) in zip(self.prefixes, values, strict=True)
+        )
+
+
+@functools.lru_cache(maxsize=256)
+def query_template(keys: tuple[str, ...]):
+    return QueryTemplate(
+        keys=keys,
+        prefixes=tuple(
+            ("&" if i else "") + quote(key) + "=" for (i, key) in enumerate(keys)
+        ),
+    )
+
+
+def encode_query(params: Any):
+    if params is None:
+        return ""
+    if isinstance(params, str):
+        return params
+    if isinstance(params, Mapping):
+        params = tuple(params.items())
+    keys = tuple(key for (key, _) in params)
+    return query_template(keys).render(
+        "" if value is None else str(value) for (_, value) in params
+    )
+
+
+@dataclasses.dataclass
+class Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    def close(self):
+        self.writer.close()
+
+
+@dataclasses.dataclass
+class LiteResponse(ntu_css.http.Response):
+    status_code: int
+    reason: str
+    headers: email.message.Message
+    body: bytes
+    request_url: str
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise HTTPStatusError(self.status_code, self.reason, self.request_url)
+
+    def content(self):
+        return self.body
+
+    def text(self):
+        charset = self.headers.get_content_charset()
+        if charset is None:
+            charset = "utf-8"
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+    def url(self):
+        return self.request_url
+
+    def status(self):
+        return self.status_code
+
+    def info(self):
+        return self.headers
+
+
+async def read_headers(reader: asyncio.StreamReader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before response")
+    version, status_code, *reason = status_line.decode("iso-8859-1").split(" ", 2)
+    if not version.startswith("HTTP/1."):
+        raise RemoteProtocolError(status_line)
+    lines = []
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        lines.append(line.decode("iso-8859-1"))
+    headers = email.message.Message()
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return version, int(status_code), "".join(reason).strip(), headers
+
+
+async def read_chunked_body(reader: asyncio.StreamReader):
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0], 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()
+
+
+def replayable(method: str, url: str):
+    return (
+        method in IDEMPOTENT_METHODS
+        and ntu_css.scheduler.classify_request(method, url)
+        == ntu_css.scheduler.RequestPriority.read
+    )
+
+
+def decode_body(body: bytes, content_encoding: str | None):
+    if content_encoding == "gzip":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if content_encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+@dataclasses.dataclass
+class LiteClient(ntu_css.http.Client):
+    base: str = ""
+    timeout: float | None = 5.0
+    max_idle_connections_per_host: int = 8
+    user_agent: str = "ntu-css"
+    ssl_context: ssl.SSLContext = dataclasses.field(
+        default_factory=ssl.create_default_context
+    )
+    cookie_jar: http.cookiejar.CookieJar = dataclasses.field(
+        default_factory=http.cookiejar.CookieJar
+    )
+    idle_connections: dict[tuple[str, str, int], list[Connection]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    def base_url(self):
+        return self.base
+
+    def cookies(self):
+        return [
+            ntu_css.http.Cookie(
+                name=cookie.name,
+                value=cookie.value,
+                domain=cookie.domain,
+                path=cookie.path,
+            )
+            for cookie in self.cookie_jar
+            if cookie.value is not None
+        ]
+
+    def set_cookies(self, cookies: Iterable[ntu_css.http.Cookie]):
+        for cookie in cookies:
+            self.cookie_jar.set_cookie(
+                http.cookiejar.Cookie(
+                    version=0,
+                    name=cookie.name,
+                    value=cookie.value,
+                    port=None,
+                    port_specified=False,
+                    domain=cookie.domain,
+                    domain_specified=cookie.domain.startswith("."),
+                    domain_initial_dot=cookie.domain.startswith("."),
+                    path=cookie.path,
+                    path_specified=True,
+                    secure=False,
+                    expires=None,
+                    discard=True,
+                    comment=None,
+                    comment_url=None,
+                    rest={},
+                )
+            )
+
+    async def connect(self, origin: tuple[str, str, int], reuse: bool = True):
+        idle_connections = self.idle_connections.get(origin)
+        while reuse and idle_connections:
+            connection = idle_connections.pop()
+            if not connection.reader.at_eof():
+                return connection, True
+            connection.close()
+        scheme, host, port = origin
+        reader, writer = await asyncio.open_connection(
+            host,
+            port,
+            ssl=self.ssl_context if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+        )
+        return Connection(reader, writer), False
+
+    def release(self, origin: tuple[str, str, int], connection: Connection):
+        idle_connections = self.idle_connections.setdefault(origin, [])
+        if len(idle_connections) < self.max_idle_connections_per_host:
+            idle_connections.append(connection)
+        else:
+            connection.close()
+
+    async def send(self, method: str, url: str, data: Mapping[str, str] | None):
+        parse_result = urllib.parse.urlsplit(url)
+        scheme = parse_result.scheme
+        host = parse_result.hostname
+        assert scheme in ("http", "https") and host is not None
+        port = parse_result.port or (443 if scheme == "https" else 80)
+        origin = (scheme, host, port)
+        target = parse_result.path or "/"
+        if parse_result.query:
+            target += "?" + parse_result.query
+
+        cookie_request = urllib.request.Request(url, method=method)
+        self.cookie_jar.add_cookie_header(cookie_request)
+        header_lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {parse_result.netloc}",
+            f"User-Agent: {self.user_agent}",
+            "Accept: */*",
+            "Accept-Encoding: gzip, deflate",
+            "Connection: keep-alive",
+        ]
+        cookie = cookie_request.get_header("Cookie")
+        if cookie is not None:
+            header_lines.append(f"Cookie: {cookie}")
+        body = b""
+        if data is not None:
+            body = encode_query(tuple(data.items())).encode("ascii")
+            header_lines.append("Content-Type: application/x-www-form-urlencoded")
+        if data is not None or method in ("POST", "PUT", "PATCH"):
+            header_lines.append(f"Content-Length: {len(body)}")
+        request_bytes = ("\r\n".join(header_lines) + "\r\n\r\n").encode() + body
+
+        connection, reused = await self.connect(origin)
+        try:
+            try:
+                connection.writer.write(request_bytes)
+                await connection.writer.drain()
+            except ConnectionError:
+                if not reused:
+                    raise
+                connection.close()
+                connection, reused = await self.connect(origin, reuse=False)
+                connection.writer.write(request_bytes)
+                await connection.writer.drain()
+            try:
+                version, status_code, reason, headers = await read_headers(
+                    connection.reader
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not (reused and replayable(method, url)):
+                    raise
+                connection.close()
+                connection, reused = await self.connect(origin, reuse=False)
+                connection.writer.write(request_bytes)
+                await connection.writer.drain()
+                version, status_code, reason, headers = await read_headers(
+                    connection.reader
+                )
+            keep_alive = version == "HTTP/1.1" and (
+                headers.get("Connection", "").lower() != "close"
+            )
+            if method == "HEAD" or status_code in (204, 304) or status_code < 200:
+                content = b""
+            elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+                content = await read_chunked_body(connection.reader)
+            elif headers.get("Content-Length") is not None:
+                content = await connection.reader.readexactly(
+                    int(headers["Content-Length"])
+                )
+            else:
+                content = await connection.reader.read()
+                keep_alive = False
+        except BaseException:
+            connection.close()
+            raise
+        if keep_alive:
+            self.release(origin, connection)
+        else:
+            connection.close()
+
+        response = LiteResponse(
+            status_code=status_code,
+            reason=reason,
+            headers=headers,
+            body=decode_body(content, headers.get("Content-Encoding")),
+            request_url=url,
+        )
+        self.cookie_jar.extract_cookies(response, cookie_request)  # type: ignore
+        return response
+
+    async def send_with_timeout(
+        self, method: str, url: str, data: Mapping[str, str] | None
+    ):
+        return await asyncio.wait_for(self.send(method, url, data), self.timeout)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data=None,
+        params=None,
+        follow_redirects: bool = False,
+    ):
+        url = urllib.parse.urljoin(self.base, url)
+        query = encode_query(params)
+        if query:
+            url = urllib.parse.urlunsplit(
+                urllib.parse.urlsplit(url)._replace(query=query)
+            )
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await ntu_css.deadlines.bounded(
+                self.send_with_timeout(method, url, data)
+            )
+            location = response.headers.get("Location")
+            if (
+                not follow_redirects
+                or response.status_code not in REDIRECT_STATUS_CODES
+                or location is None
+            ):
+                return response
+            url = urllib.parse.urljoin(url, location)
+            if response.status_code == 303 or (
+                response.status_code in (301, 302) and method == "POST"
+            ):
+                method = "GET"
+                data = None
+        raise RemoteProtocolError("too many redirects")
+
+    async def aclose(self):
+        for idle_connections in self.idle_connections.values():
+            for connection in idle_connections:
+                connection.close()
+                await connection.writer.wait_closed()
+        self.idle_connections.clear()
@@ -1,9 +1,9 @@
 import dataclasses
 import enum
-from collections.abc import Iterable
 
 import lxml.html
 
+import ntu_css.catalog
 import ntu_css.exceptions
 import ntu_css.http
 import ntu_css.single_sign_on
@@ -34,10 +34,6 @@ FAILED_COURSES_TABLE_HEADER_TEXT_CONTENTS = (
 )
 
 
-def check_table_headers(table_row: lxml.html.HtmlElement, text_contents: Iterable[str]):
-    ntu_css.utils.check_table_headers(table_row, "th/strong", text_contents)
-
-
 @dataclasses.dataclass
 class ResultItem:
     serial_number: str
@@ -51,9 +47,14 @@ class ResultItem:
 
 
 def table_row_to_result_item(table_row: lxml.html.HtmlElement):
-    table_data_cells = ntu_css.utils.check_table_row_for_data(
-        table_row, RESULT_TABLE_HEADER_TEXT_CONTENTS
+    return table_data_cells_to_result_item(
+        ntu_css.utils.check_table_row_for_data(
+            table_row, RESULT_TABLE_HEADER_TEXT_CONTENTS
+        )
     )
+
+
+def table_data_cells_to_result_item(table_data_cells: list[lxml.html.HtmlElement]):
     return ResultItem(
         serial_number=ntu_css.utils.text_content(table_data_cells[0]),
         curriculum_number=ntu_css.utils.text_content(table_data_cells[1]),
@@ -73,9 +74,16 @@ class OperationLogItem:
 
 
 def table_row_to_operation_log_item(table_row: lxml.html.HtmlElement):
-    table_data_cells = ntu_css.utils.check_table_row_for_data(
-        table_row, OPERATION_LOG_TABLE_HEADER_TEXT_CONTENTS
+    return table_data_cells_to_operation_log_item(
+        ntu_css.utils.check_table_row_for_data(
+            table_row, OPERATION_LOG_TABLE_HEADER_TEXT_CONTENTS
+        )
     )
+
+
+def table_data_cells_to_operation_log_item(
+    table_data_cells: list[lxml.html.HtmlElement],
+):
     return OperationLogItem(
         time=ntu_css.utils.text_content(table_data_cells[0]),
         message=ntu_css.utils.text_content(table_data_cells[1]),
@@ -95,9 +103,14 @@ class FailedCourse:
 
 
 def table_row_to_failed_course(table_row: lxml.html.HtmlElement):
-    table_data_cells = ntu_css.utils.check_table_row_for_data(
-        table_row, FAILED_COURSES_TABLE_HEADER_TEXT_CONTENTS
+    return table_data_cells_to_failed_course(
+        ntu_css.utils.check_table_row_for_data(
+            table_row, FAILED_COURSES_TABLE_HEADER_TEXT_CONTENTS
+        )
     )
+
+
+def table_data_cells_to_failed_course(table_data_cells: list[lxml.html.HtmlElement]):
     return FailedCourse(
         serial_number=ntu_css.utils.text_content(table_data_cells[0]),
         curriculum_number=ntu_css.utils.text_content(table_data_cells[1]),
@@ -123,24 +136,42 @@ class TableNotFound(ntu_css.exceptions.Error):
         return repr(self.heading_message)
 
 
+def check_login_response(response: ntu_css.http.Response):
+    assert response.url() == "https://if177.aca.ntu.edu.tw/qcaureg/index.asp"
+
+
 @dataclasses.dataclass
 class Client:
     client: ntu_css.http.Client
 
-    async def login(self, username: str, password: str):
-        response = await self.client.request(
-            "GET",
-            "https://if177.aca.ntu.edu.tw/qcaureg/stulogin.asp",
-            follow_redirects=True,
-        )
+    layout_validation_cache: ntu_css.utils.LayoutValidationCache | None = None
 
-        request = ntu_css.single_sign_on.login(response, username, password)
+    session_broker: ntu_css.single_sign_on.SessionBroker | None = None
 
-        response = await self.client.request(
-            request.method, request.url, data=request.data, follow_redirects=True
+    catalog: ntu_css.catalog.Catalog | None = None
+
+    def check_table(
+        self,
+        table_rows: list[lxml.html.HtmlElement],
+        table_header_text_contents: tuple[str, ...],
+    ):
+        return ntu_css.utils.check_table(
+            table_header_row=table_rows[0],
+            path="th/strong",
+            table_rows=table_rows[1:],
+            table_header_text_contents=table_header_text_contents,
+            layout_validation_cache=self.layout_validation_cache,
+        )
+
+    async def login(self, username: str, password: str):
+        await ntu_css.single_sign_on.login_via(
+            http_client=self.client,
+            url="https://if177.aca.ntu.edu.tw/qcaureg/stulogin.asp",
+            username=username,
+            password=password,
+            check=check_login_response,
+            session_broker=self.session_broker,
         )
-        response.raise_for_status()
-        assert response.url() == "https://if177.aca.ntu.edu.tw/qcaureg/index.asp"
 
     async def get_result(self, kind: ResultKind):
         response = await self.client.request(
@@ -154,9 +185,12 @@ class Client:
             document.xpath('//*[@id="content"]/center[1]/table/tr')
         )
         assert len(table_rows) >= 1
-        check_table_headers(table_rows[0], RESULT_TABLE_HEADER_TEXT_CONTENTS)
-        for table_row in table_rows[1:]:
-            yield table_row_to_result_item(table_row)
+        for table_data_cells in self.check_table(
+            table_rows, RESULT_TABLE_HEADER_TEXT_CONTENTS
+        ):
+            yield ntu_css.catalog.record(
+                self.catalog, table_data_cells_to_result_item(table_data_cells)
+            )
 
     async def get_operation_log(self, kind: ResultKind):
         response = await self.client.request(
@@ -175,9 +209,10 @@ class Client:
             )
             text_content = ntu_css.utils.text_content(heading)
             raise TableNotFound(heading_message=text_content)
-        check_table_headers(table_rows[0], OPERATION_LOG_TABLE_HEADER_TEXT_CONTENTS)
-        for table_row in table_rows[1:]:
-            yield table_row_to_operation_log_item(table_row)
+        for table_data_cells in self.check_table(
+            table_rows, OPERATION_LOG_TABLE_HEADER_TEXT_CONTENTS
+        ):
+            yield table_data_cells_to_operation_log_item(table_data_cells)
 
     async def get_failed_courses(self, kind: ResultKind):
         response = await self.client.request(
@@ -191,6 +226,9 @@ class Client:
             document.xpath('//*[@id="content"]/table/tr')
         )
         assert len(table_rows) >= 1
-        check_table_headers(table_rows[0], FAILED_COURSES_TABLE_HEADER_TEXT_CONTENTS)
-        for table_row in table_rows[1:]:
-            yield table_row_to_failed_course(table_row)
+        for table_data_cells in self.check_table(
+            table_rows, FAILED_COURSES_TABLE_HEADER_TEXT_CONTENTS
+        ):
+            yield ntu_css.catalog.record(
+                self.catalog, table_data_cells_to_failed_course(table_data_cells)
+            )
@@ -0,0 +1,73 @@
+import asyncio
+import dataclasses
+import random
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import ntu_css.deadlines
+import ntu_css.exceptions
+
+T = TypeVar("T")
+
+RETRYABLE_ERROR_KINDS = frozenset(
+    (ntu_css.exceptions.ErrorKind.course_full, ntu_css.exceptions.ErrorKind.unknown)
+)
+
+
+def is_retryable(e: BaseException):
+    return (
+        isinstance(e, ntu_css.exceptions.ServerMessageError)
+        and e.kind in RETRYABLE_ERROR_KINDS
+    )
+
+
+@dataclasses.dataclass
+class RetryBudget:
+    max_tokens: float = 10.0
+    ratio: float = 0.1
+    tokens: float = 10.0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    jitter: float = 1.0
+    retryable: Callable[[BaseException], bool] = is_retryable
+    budget: RetryBudget | None = None
+
+    def delay(self, attempt: int):
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def should_retry(self, e: BaseException, attempt: int, delay: float):
+        if attempt >= self.max_attempts or not self.retryable(e):
+            return False
+        remaining = ntu_css.deadlines.remaining()
+        if remaining is not None and remaining <= delay:
+            return False
+        return self.budget is None or self.budget.withdraw()
+
+    async def run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        if self.budget is not None:
+            self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await operation()
+            except Exception as e:
+                attempt += 1
+                delay = self.delay(attempt - 1)
+                if not self.should_retry(e, attempt, delay):
+                    raise
+            await asyncio.sleep(delay)
@@ -0,0 +1,143 @@
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import enum
+import urllib.parse
+from collections.abc import Callable, Hashable, Iterable
+
+import ntu_css.deadlines
+import ntu_css.exceptions
+import ntu_css.http
+
+MUTATION_PATH_NAMES = frozenset(("add-cou", "del-cou"))
+
+
+class QueueFull(ntu_css.exceptions.Error):
+    pass
+
+
+class RequestPriority(enum.IntEnum):
+    mutation = 0
+    read = 1
+
+
+def classify_request(method: str, url: str):
+    path = urllib.parse.urlparse(url).path
+    if path.rsplit("/", 1)[-1] in MUTATION_PATH_NAMES:
+        return RequestPriority.mutation
+    return RequestPriority.read
+
+
+@dataclasses.dataclass
+class Scheduler:
+    slots: int
+    max_queue_depth: int | None = None
+    active: int = 0
+    queues: dict[
+        RequestPriority,
+        collections.OrderedDict[Hashable, collections.deque[asyncio.Future[None]]],
+    ] = dataclasses.field(
+        default_factory=lambda: {
+            priority: collections.OrderedDict() for priority in RequestPriority
+        }
+    )
+
+    def pending(self, account: Hashable, priority: RequestPriority):
+        queue = self.queues[priority].get(account)
+        if queue is None:
+            return 0
+        return sum(not future.done() for future in queue)
+
+    def pop_waiter(self):
+        for priority in RequestPriority:
+            accounts = self.queues[priority]
+            while accounts:
+                account, queue = next(iter(accounts.items()))
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del accounts[account]
+                    continue
+                future = queue.popleft()
+                if queue:
+                    accounts.move_to_end(account)
+                else:
+                    del accounts[account]
+                return future
+        return None
+
+    def dispatch(self):
+        while self.active < self.slots:
+            future = self.pop_waiter()
+            if future is None:
+                return
+            self.active += 1
+            future.set_result(None)
+
+    async def acquire(self, account: Hashable, priority: RequestPriority):
+        if self.active < self.slots:
+            self.active += 1
+            return
+        if (
+            self.max_queue_depth is not None
+            and self.pending(account, priority) >= self.max_queue_depth
+        ):
+            raise QueueFull(account, priority)
+        future = asyncio.get_running_loop().create_future()
+        accounts = self.queues[priority]
+        accounts.setdefault(account, collections.deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self.dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, account: Hashable, priority: RequestPriority):
+        await self.acquire(account, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+@dataclasses.dataclass
+class ScheduledClient(ntu_css.http.Client):
+    client: ntu_css.http.Client
+    scheduler: Scheduler
+    account: Hashable
+    classify: Callable[[str, str], RequestPriority] = classify_request
+
+    def base_url(self):
+        return self.client.base_url()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data=None,
+        params=None,
+        follow_redirects: bool = False,
+    ):
+        await ntu_css.deadlines.bounded(
+            self.scheduler.acquire(self.account, self.classify(method, url))
+        )
+        try:
+            return await self.client.request(
+                method, url, data=data, params=params, follow_redirects=follow_redirects
+            )
+        finally:
+            self.scheduler.release()
+
+    def cookies(self):
+        return self.client.cookies()
+
+    def set_cookies(self, cookies: Iterable[ntu_css.http.Cookie]):
+        self.client.set_cookies(cookies)
@@ -0,0 +1,226 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import os
+import queue
+import time
+import urllib.parse
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from typing import Any
+
+import ntu_css.deadlines
+import ntu_css.http
+
+STATE_FIELDS = 4
+
+
+@dataclasses.dataclass
+class SharedRateLimiter:
+    hosts: tuple[str, ...]
+    rate: float
+    burst: float
+    failure_threshold: int
+    cooldown: float
+    lock: Any
+    state: Any
+
+    def offset(self, host: str | None):
+        if host not in self.hosts:
+            return None
+        return self.hosts.index(host) * STATE_FIELDS
+
+    def try_acquire(self, host: str | None):
+        i = self.offset(host)
+        if i is None:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated, _, unhealthy_until = self.state[i : i + STATE_FIELDS]
+            if now < unhealthy_until:
+                return unhealthy_until - now
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            self.state[i + 1] = now
+            if tokens >= 1:
+                self.state[i] = tokens - 1
+                return 0.0
+            self.state[i] = tokens
+            return (1 - tokens) / self.rate
+
+    async def acquire(self, host: str | None):
+        while (wait := self.try_acquire(host)) > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self, host: str | None):
+        i = self.offset(host)
+        if i is None:
+            return
+        with self.lock:
+            self.state[i + 2] = 0
+
+    def record_failure(self, host: str | None):
+        i = self.offset(host)
+        if i is None:
+            return
+        with self.lock:
+            failures = self.state[i + 2] + 1
+            if failures >= self.failure_threshold:
+                self.state[i + 3] = time.monotonic() + self.cooldown
+                failures = 0
+            self.state[i + 2] = failures
+
+    def healthy(self, host: str | None):
+        i = self.offset(host)
+        return i is None or time.monotonic() >= self.state[i + 3]
+
+
+def shared_rate_limiter(
+    hosts: Iterable[str],
+    rate: float,
+    burst: float,
+    failure_threshold: int = 5,
+    cooldown: float = 30.0,
+    context: Any = multiprocessing,
+):
+    hosts = tuple(hosts)
+    state = context.Array("d", len(hosts) * STATE_FIELDS, lock=False)
+    now = time.monotonic()
+    for i in range(len(hosts)):
+        state[i * STATE_FIELDS] = burst
+        state[i * STATE_FIELDS + 1] = now
+    return SharedRateLimiter(
+        hosts=hosts,
+        rate=rate,
+        burst=burst,
+        failure_threshold=failure_threshold,
+        cooldown=cooldown,
+        lock=context.Lock(),
+        state=state,
+    )
+
+
+@dataclasses.dataclass
+class RateLimitedClient(ntu_css.http.Client):
+    client: ntu_css.http.Client
+    limiter: SharedRateLimiter
+
+    def base_url(self):
+        return self.client.base_url()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data=None,
+        params=None,
+        follow_redirects: bool = False,
+    ):
+        host = urllib.parse.urlsplit(
+            urllib.parse.urljoin(self.client.base_url(), url)
+        ).hostname
+        await ntu_css.deadlines.bounded(self.limiter.acquire(host))
+        try:
+            response = await self.client.request(
+                method, url, data=data, params=params, follow_redirects=follow_redirects
+            )
+        except Exception:
+            self.limiter.record_failure(host)
+            raise
+        status = response.status()
+        if status is not None and (status >= 500 or status == 429):
+            self.limiter.record_failure(host)
+        else:
+            self.limiter.record_success(host)
+        return response
+
+    def cookies(self):
+        return self.client.cookies()
+
+    def set_cookies(self, cookies: Iterable[ntu_css.http.Cookie]):
+        self.client.set_cookies(cookies)
+
+
+@dataclasses.dataclass
+class AccountResult:
+    account: Any
+    result: Any = None
+    error: str | None = None
+
+
+Job = Callable[[Any, SharedRateLimiter], Awaitable[Any]]
+
+
+async def run_shard(
+    accounts: Sequence[Any],
+    job: Job,
+    limiter: SharedRateLimiter,
+    concurrency: int,
+    results: Any,
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_account(account: Any):
+        async with semaphore:
+            try:
+                result = await job(account, limiter)
+            except Exception as e:
+                results.put(AccountResult(account, error=f"{type(e).__name__}: {e}"))
+            else:
+                results.put(AccountResult(account, result=result))
+
+    await asyncio.gather(*(run_account(account) for account in accounts))
+
+
+def worker_main(
+    accounts: Sequence[Any],
+    job: Job,
+    limiter: SharedRateLimiter,
+    concurrency: int,
+    results: Any,
+):
+    try:
+        asyncio.run(run_shard(accounts, job, limiter, concurrency, results))
+    finally:
+        results.put(None)
+
+
+def run_sharded(
+    accounts: Sequence[Any],
+    job: Job,
+    limiter: SharedRateLimiter,
+    processes: int | None = None,
+    concurrency: int = 16,
+    context: Any = multiprocessing,
+):
+    if processes is None:
+        processes = os.cpu_count() or 1
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=worker_main,
+            args=(accounts[i::processes], job, limiter, concurrency, results),
+        )
+        for i in range(min(processes, len(accounts)))
+    ]
+    for worker in workers:
+        worker.start()
+    remaining = len(workers)
+    try:
+        while remaining:
+            try:
+                item = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+            if item is None:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        if remaining:
+            for worker in workers:
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        results.close()
@@ -1,10 +1,19 @@
+import dataclasses
 import urllib.parse
+from collections.abc import Callable
+from typing import TypeVar
 
 import lxml.html
 
 import ntu_css.http
 import ntu_css.utils
 
+T = TypeVar("T")
+
+HOST = "web2.cc.ntu.edu.tw"
+
+LOGIN_URL = "https://web2.cc.ntu.edu.tw/p/s/login2/p1.php"
+
 
 def form_fields(form: lxml.html.FormElement):
     for key in form.fields:
@@ -19,7 +28,7 @@ def form_fields(form: lxml.html.FormElement):
 
 def login(response: ntu_css.http.Response, username: str, password: str):
     response.raise_for_status()
-    assert response.url() == "https://web2.cc.ntu.edu.tw/p/s/login2/p1.php"
+    assert response.url() == LOGIN_URL
 
     document = ntu_css.utils.document_from_string(response.text())
     (form,) = ntu_css.utils.assert_list_of_form_element(
@@ -37,3 +46,62 @@ def login(response: ntu_css.http.Response, username: str, password: str):
     return ntu_css.http.Request(
         method=method, url=urllib.parse.urljoin(response.url(), action), data=data
     )
+
+
+def is_login_page(response: ntu_css.http.Response):
+    return response.url() == LOGIN_URL
+
+
+def domain_match(host: str, domain: str):
+    if domain.startswith("."):
+        return host == domain[1:] or host.endswith(domain)
+    return host == domain
+
+
+@dataclasses.dataclass
+class SessionBroker:
+    cookies: dict[str, list[ntu_css.http.Cookie]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    def store(self, username: str, http_client: ntu_css.http.Client):
+        self.cookies[username] = [
+            cookie
+            for cookie in http_client.cookies()
+            if domain_match(HOST, cookie.domain)
+        ]
+
+    def restore(self, username: str, http_client: ntu_css.http.Client):
+        http_client.set_cookies(self.cookies.get(username, ()))
+
+    def discard(self, username: str):
+        self.cookies.pop(username, None)
+
+
+async def login_via(
+    http_client: ntu_css.http.Client,
+    url: str,
+    username: str,
+    password: str,
+    check: Callable[[ntu_css.http.Response], T],
+    session_broker: SessionBroker | None = None,
+) -> T:
+    if session_broker is not None:
+        session_broker.restore(username, http_client)
+    response = await http_client.request("GET", url, follow_redirects=True)
+    reused = session_broker is not None and not is_login_page(response)
+    if not reused:
+        request = login(response=response, username=username, password=password)
+        response = await http_client.request(
+            request.method, request.url, data=request.data, follow_redirects=True
+        )
+    response.raise_for_status()
+    try:
+        result = check(response)
+    except Exception:
+        if reused and session_broker is not None:
+            session_broker.discard(username)
+        raise
+    if session_broker is not None:
+        session_broker.store(username, http_client)
+    return result
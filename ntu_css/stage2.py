@@ -3,6 +3,7 @@ from collections.abc import Iterable
 
 import lxml.html
 
+import ntu_css.catalog
 import ntu_css.exceptions
 import ntu_css.http
 import ntu_css.single_sign_on
@@ -10,14 +11,23 @@ import ntu_css.something
 import ntu_css.utils
 
 
-class ErrorMessageInContentDivisionFromServer(ntu_css.exceptions.Error):
+class ErrorMessageInContentDivisionFromServer(ntu_css.exceptions.ServerMessageError):
     pass
 
 
-def table_row_to_course_selection_list_item(table_row: lxml.html.HtmlElement):
+def check_table_row(table_row: lxml.html.HtmlElement):
     table_data_cells = ntu_css.utils.assert_list_of_html_element(table_row.xpath("td"))
     assert len(table_data_cells) == 9
+    return table_data_cells
+
+
+def table_row_to_course_selection_list_item(table_row: lxml.html.HtmlElement):
+    return table_data_cells_to_course_selection_list_item(check_table_row(table_row))
+
 
+def table_data_cells_to_course_selection_list_item(
+    table_data_cells: list[lxml.html.HtmlElement],
+):
     priority = int(
         ntu_css.utils.remove_suffix(
             ntu_css.utils.assert_str(
@@ -78,6 +88,10 @@ class CourseSelectionClient:
 
     client: ntu_css.http.Client
 
+    layout_validation_cache: ntu_css.utils.LayoutValidationCache | None = None
+
+    catalog: ntu_css.catalog.Catalog | None = None
+
     async def list_courses(self):
         response = await self.client.request(
             "GET",
@@ -93,19 +107,36 @@ class CourseSelectionClient:
             document.xpath("/html/body/div/table/tr")
         )
         assert len(table_rows) >= 1
-        table_headers = ntu_css.utils.assert_list_of_html_element(
-            table_rows[0].xpath("th")
-        )
-        assert len(table_headers) == 9
-        table_data_cells = ntu_css.utils.assert_list_of_html_element(
-            table_rows[0].xpath("td")
+
+        def validate():
+            table_headers = ntu_css.utils.assert_list_of_html_element(
+                table_rows[0].xpath("th")
+            )
+            assert len(table_headers) == 9
+            table_data_cells = ntu_css.utils.assert_list_of_html_element(
+                table_rows[0].xpath("td")
+            )
+            assert not table_data_cells
+            for table_row in table_rows[1:]:
+                check_table_row(table_row)
+
+        ntu_css.utils.validate_layout(
+            self.layout_validation_cache,
+            lambda: ntu_css.utils.table_layout_fingerprint(
+                table_rows[0], table_rows[1:]
+            ),
+            validate,
         )
-        assert not table_data_cells
         for table_row in table_rows[1:]:
-            yield table_row_to_course_selection_list_item(table_row)
+            yield ntu_css.catalog.record(
+                self.catalog,
+                table_data_cells_to_course_selection_list_item(
+                    ntu_css.utils.select_table_data_cells(table_row)
+                ),
+            )
 
     async def add_course(self, serno: str, priority: int):
-        ntu_css.utils.check_serial_number(serno)
+        ntu_css.catalog.check_serial_number(self.catalog, serno)
         check_priority(priority)
         response = await self.client.request(
             "GET",
@@ -128,14 +159,14 @@ class CourseSelectionClient:
         if len(content_divisions) == 1:
             text_content = ntu_css.utils.text_content(content_divisions[0])
             if text_content != "\n\t\t\t\t\t加選登記成功\t\t\t\t":
-                raise ErrorMessageInContentDivisionFromServer(repr(text_content))
+                raise ErrorMessageInContentDivisionFromServer(text_content)
             return
         assert not content_divisions
         content_division = ntu_css.utils.xpath_only_one_html_element(
             document, "/html/body/div/div"
         )
         text_content = ntu_css.utils.text_content(content_division)
-        raise ErrorMessageInContentDivisionFromServer(repr(text_content))
+        raise ErrorMessageInContentDivisionFromServer(text_content)
 
     async def delete_course(self, serno: str):
         response = await self.client.request(
@@ -158,29 +189,28 @@ class CourseSelectionClient:
             not text_content
             == f"\n\t\t\t\t\t\t\t\t\t退選科目流水號: {serno}完成退選\t\t\t\t\t\t\t\t"
         ):
-            raise ErrorMessageInContentDivisionFromServer(repr(text_content))
+            raise ErrorMessageInContentDivisionFromServer(text_content)
 
 
 @dataclasses.dataclass
 class LoginClient:
     client: ntu_css.http.Client
 
+    session_broker: ntu_css.single_sign_on.SessionBroker | None = None
+
     async def login(self, username: str, password: str):
-        response = await self.client.request(
-            "GET", "/coursetake/login.aspx", follow_redirects=True
-        )
-        request = ntu_css.single_sign_on.login(
-            response=response, username=username, password=password
-        )
-        response = await self.client.request(
-            request.method, request.url, data=request.data, follow_redirects=True
-        )
-        response.raise_for_status()
-        query = ntu_css.utils.check_response_url(
-            response=response,
+        query = await ntu_css.single_sign_on.login_via(
             http_client=self.client,
-            path="/coursetake/index.php/survey-note",
-            query_keys={"regno", "lang", "extid"},
+            url="/coursetake/login.aspx",
+            username=username,
+            password=password,
+            check=lambda response: ntu_css.utils.check_response_url(
+                response=response,
+                http_client=self.client,
+                path="/coursetake/index.php/survey-note",
+                query_keys={"regno", "lang", "extid"},
+            ),
+            session_broker=self.session_broker,
         )
         return ntu_css.something.SessionInfo(
             regno=query["regno"][0], lang=query["lang"][0], extid=query["extid"][0]
@@ -0,0 +1,116 @@
+import dataclasses
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    account TEXT NOT NULL,
+    record_type TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    serial_number TEXT,
+    data TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (account, record_type, kind, key)
+);
+CREATE INDEX IF NOT EXISTS records_serial_number
+    ON records (serial_number, record_type, kind);
+CREATE INDEX IF NOT EXISTS records_kind ON records (record_type, kind, last_seen);
+"""
+
+UPSERT = """
+INSERT INTO records (
+    account, record_type, kind, key, serial_number, data, first_seen, last_seen
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (account, record_type, kind, key) DO UPDATE SET
+    serial_number = excluded.serial_number,
+    data = excluded.data,
+    last_seen = excluded.last_seen
+"""
+
+
+def record_type_name(record_type: type):
+    return f"{record_type.__module__}.{record_type.__qualname__}"
+
+
+def record_row(account: str, kind: str, item: Any, seen: float):
+    data = dataclasses.asdict(item)
+    serial_number = data.get("serial_number")
+    if serial_number is None:
+        key = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    else:
+        key = serial_number
+    return (
+        account,
+        record_type_name(type(item)),
+        kind,
+        key,
+        serial_number,
+        json.dumps(data, ensure_ascii=False),
+        seen,
+        seen,
+    )
+
+
+@dataclasses.dataclass
+class Store:
+    connection: sqlite3.Connection
+
+    def create_tables(self):
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def upsert(
+        self,
+        account: str,
+        items: Iterable[Any],
+        kind: str = "",
+        seen: float | None = None,
+    ):
+        if seen is None:
+            seen = time.time()
+        with self.connection:
+            cursor = self.connection.executemany(
+                UPSERT, (record_row(account, kind, item, seen) for item in items)
+            )
+        return cursor.rowcount
+
+    def query(
+        self,
+        record_type: type[T],
+        account: str | None = None,
+        serial_number: str | None = None,
+        kind: str | None = None,
+    ) -> list[T]:
+        conditions = ["record_type = ?"]
+        parameters: list[str] = [record_type_name(record_type)]
+        for column, value in (
+            ("account", account),
+            ("serial_number", serial_number),
+            ("kind", kind),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        cursor = self.connection.execute(
+            f"SELECT data FROM records WHERE {' AND '.join(conditions)}"
+            " ORDER BY account, kind, key",
+            parameters,
+        )
+        return [record_type(**json.loads(data)) for (data,) in cursor]
+
+    def close(self):
+        self.connection.close()
+
+
+def connect(database: str):
+    store = Store(sqlite3.connect(database))
+    store.create_tables()
+    return store
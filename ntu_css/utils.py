@@ -1,7 +1,9 @@
+import dataclasses
 import string
 import urllib.parse
-from collections.abc import Iterable
+from collections.abc import Callable, Hashable, Iterable
 
+import lxml.etree
 import lxml.html
 
 import ntu_css.http
@@ -101,6 +103,68 @@ def check_table_row_for_data(
     return table_data_cells
 
 
+def select_table_data_cells(table_row: lxml.html.HtmlElement):
+    return [element for element in table_row if element.tag == "td"]
+
+
+def table_row_shape(table_row: lxml.html.HtmlElement):
+    return tuple(element.tag for element in table_row)
+
+
+def table_layout_fingerprint(
+    table_header_row: lxml.html.HtmlElement, table_rows: Iterable[lxml.html.HtmlElement]
+):
+    return (
+        lxml.etree.tostring(table_header_row, with_tail=False),
+        frozenset(table_row_shape(table_row) for table_row in table_rows),
+    )
+
+
+@dataclasses.dataclass
+class LayoutValidationCache:
+    fingerprints: set[Hashable] = dataclasses.field(default_factory=set)
+
+    def validate(self, fingerprint: Hashable, validate: Callable[[], None]):
+        if fingerprint not in self.fingerprints:
+            validate()
+            self.fingerprints.add(fingerprint)
+
+
+def validate_layout(
+    layout_validation_cache: LayoutValidationCache | None,
+    fingerprint: Callable[[], Hashable],
+    validate: Callable[[], None],
+):
+    if layout_validation_cache is None:
+        validate()
+    else:
+        layout_validation_cache.validate(fingerprint(), validate)
+
+
+def check_table(
+    table_header_row: lxml.html.HtmlElement,
+    path: str,
+    table_rows: list[lxml.html.HtmlElement],
+    table_header_text_contents: tuple[str, ...],
+    layout_validation_cache: LayoutValidationCache | None = None,
+):
+    def validate():
+        check_table_headers(table_header_row, path, table_header_text_contents)
+        for table_row in table_rows:
+            check_table_row_for_data(table_row, table_header_text_contents)
+
+    validate_layout(
+        layout_validation_cache,
+        lambda: (
+            path,
+            table_header_text_contents,
+            table_layout_fingerprint(table_header_row, table_rows),
+        ),
+        validate,
+    )
+    return [select_table_data_cells(table_row) for table_row in table_rows]
+
+
 def check_serial_number(serial_number: str):
     if len(serial_number) != 5:
         raise ValueError("serial number length should be 5")
@@ -0,0 +1,44 @@
+import dataclasses
+from collections.abc import Callable
+
+import ntu_css.http
+
+
+@dataclasses.dataclass
+class FakeResponse(ntu_css.http.Response):
+    body: str
+    response_url: str = ""
+
+    def raise_for_status(self):
+        pass
+
+    def content(self):
+        return self.body.encode()
+
+    def text(self):
+        return self.body
+
+    def url(self):
+        return self.response_url
+
+
+@dataclasses.dataclass
+class FakeClient(ntu_css.http.Client):
+    handler: Callable[[str, str, dict], FakeResponse]
+    requests: list[tuple[str, str, dict]] = dataclasses.field(default_factory=list)
+
+    def base_url(self):
+        return "https://if192.aca.ntu.edu.tw/"
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data=None,
+        params=None,
+        follow_redirects: bool = False,
+    ):
+        params = dict(params or ())
+        self.requests.append((method, url, params))
+        return self.handler(method, url, params)
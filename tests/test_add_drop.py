@@ -0,0 +1,98 @@
+import unittest
+
+import ntu_css.add_drop
+import ntu_css.catalog
+import ntu_css.exceptions
+import ntu_css.something
+import tests.fake_http
+
+ADD_COURSE_PAGE = (
+    '<html><body><div id="div-main"><h3><font>加選成功</font></h3><table><tr></tr>'
+    "<tr><td><center><table><tr><th><font>流水號：</font></th>"
+    "<td><font>{}</font></td></tr></table></center></td></tr></table></div>"
+    "</body></html>"
+)
+
+DELETE_COURSE_PAGE = (
+    '<html><body><div id="div-main">\r\n<table><tr><td>學號： </td><td>B00000000</td>'
+    "</tr><tr><td>退選科目流水號:</td><td>{}</td></tr></table> 完成退選<b></b> <i></i>"
+    "\n\n</div></body></html>"
+)
+
+FULL_PAGE = '<html><body><div id="div-main">本課程已額滿</div></body></html>'
+
+
+def course_selection_server(failing_serial_numbers: set[str]):
+    def handler(method: str, url: str, params: dict):
+        serial_number = params["serno"]
+        if url.endswith("/del-cou"):
+            return tests.fake_http.FakeResponse(
+                DELETE_COURSE_PAGE.format(serial_number)
+            )
+        if serial_number in failing_serial_numbers:
+            return tests.fake_http.FakeResponse(FULL_PAGE)
+        return tests.fake_http.FakeResponse(ADD_COURSE_PAGE.format(serial_number))
+
+    return handler
+
+
+def make_client(http_client: tests.fake_http.FakeClient, **kwargs):
+    return ntu_css.add_drop.CourseSelectionClient(
+        ntu_css.something.SessionInfo(regno="B00000000", lang="tw", extid="x"),
+        http_client,
+        **kwargs,
+    )
+
+
+def sent(http_client: tests.fake_http.FakeClient):
+    return [
+        (url.rsplit("/", 1)[-1], params["serno"])
+        for (_, url, params) in http_client.requests
+    ]
+
+
+class SwapCourseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_swap_course(self):
+        http_client = tests.fake_http.FakeClient(course_selection_server(set()))
+        await make_client(http_client).swap_course(
+            "11111", ntu_css.add_drop.Type1Course("22222")
+        )
+        self.assertEqual(
+            sent(http_client), [("del-cou", "11111"), ("add-cou", "22222")]
+        )
+
+    async def test_failed_add_is_rolled_back_without_catalog_check(self):
+        catalog = ntu_css.catalog.Catalog(reject_unknown=True)
+        catalog.record(ntu_css.catalog.Course(serial_number="22222"))
+        http_client = tests.fake_http.FakeClient(course_selection_server({"22222"}))
+        with self.assertRaises(ntu_css.add_drop.ErrorMessageFromServer) as context:
+            await make_client(http_client, catalog=catalog).swap_course(
+                "11111", ntu_css.add_drop.Type1Course("22222")
+            )
+        self.assertEqual(
+            context.exception.kind, ntu_css.exceptions.ErrorKind.course_full
+        )
+        self.assertEqual(
+            sent(http_client),
+            [("del-cou", "11111"), ("add-cou", "22222"), ("add-cou", "11111")],
+        )
+
+    async def test_failed_rollback_keeps_original_error(self):
+        http_client = tests.fake_http.FakeClient(
+            course_selection_server({"11111", "22222"})
+        )
+        with self.assertRaises(ntu_css.add_drop.ErrorMessageFromServer) as context:
+            await make_client(http_client).swap_course(
+                "11111", ntu_css.add_drop.Type1Course("22222")
+            )
+        self.assertIsInstance(
+            context.exception.__context__, ntu_css.add_drop.ErrorMessageFromServer
+        )
+        self.assertEqual(len(http_client.requests), 3)
+
+
+class ErrorMessageFromServerTest(unittest.TestCase):
+    def test_is_hashable(self):
+        e = ntu_css.add_drop.ErrorMessageFromServer("本課程已額滿")
+        self.assertIn(e, {e})
+        self.assertEqual(e.kind, ntu_css.exceptions.ErrorKind.course_full)
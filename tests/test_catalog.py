@@ -0,0 +1,48 @@
+import unittest
+
+import ntu_css.catalog
+import ntu_css.results
+import tests.fake_http
+
+RESULT_PAGE = (
+    "<html><head><meta charset='utf-8'></head>"
+    "<body><div id='content'><center><table><tr>"
+    + "".join(
+        f"<th><strong>{text}</strong></th>"
+        for text in ntu_css.results.RESULT_TABLE_HEADER_TEXT_CONTENTS
+    )
+    + "</tr>"
+    + "".join(
+        f"<tr><td>{serial_number}</td><td>CSIE1212</td><td>902 10750</td>"
+        "<td>01</td><td>Operating Systems </td><td>3</td><td>Teacher </td>"
+        "<td></td></tr>"
+        for serial_number in ("12345", "23456")
+    )
+    + "</table></center></div></body></html>"
+)
+
+
+class CatalogTest(unittest.IsolatedAsyncioTestCase):
+    async def test_results_page_fills_catalog(self):
+        catalog = ntu_css.catalog.Catalog(reject_unknown=True)
+        client = ntu_css.results.Client(
+            tests.fake_http.FakeClient(
+                lambda method, url, params: tests.fake_http.FakeResponse(RESULT_PAGE)
+            ),
+            catalog=catalog,
+        )
+        items = [
+            item
+            async for item in client.get_result(
+                ntu_css.results.ResultKind.preregistration_stage1
+            )
+        ]
+        self.assertEqual([item.serial_number for item in items], ["12345", "23456"])
+        course = catalog.get("12345")
+        assert course is not None
+        self.assertEqual(course.course_name, "Operating Systems")
+        self.assertIs(type(course.course_name), str)
+        self.assertIs(items[0].course_name, items[1].course_name)
+        catalog.check_serial_number("23456")
+        with self.assertRaises(ntu_css.catalog.UnknownSerialNumber):
+            catalog.check_serial_number("34567")
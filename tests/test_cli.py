@@ -0,0 +1,24 @@
+import contextlib
+import io
+import unittest
+
+import ntu_css.cli
+
+
+class BatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_invalid_lines_fail_without_stopping_the_batch(self):
+        session = ntu_css.cli.Session(
+            username="user",
+            password="password",
+            system=ntu_css.cli.SYSTEM_STAGE2,
+            base_url="https://example.com/",
+        )
+        args = ntu_css.cli.make_parser().parse_args(["batch", "-"])
+        args.job_file = io.StringIO("bogus 1\nadd 1234\nadd 97001\n# comment\n")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit) as context:
+                await ntu_css.cli.batch(session, args)
+        self.assertEqual(context.exception.code, 1)
+        self.assertEqual(len(stderr.getvalue().splitlines()), 3)
+        self.assertEqual(session.http_clients, [])
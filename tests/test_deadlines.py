@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+import httpx
+
+import ntu_css.add_drop
+import ntu_css.deadlines
+import ntu_css.http
+import ntu_css.retry
+import ntu_css.stage2
+import tests.fake_http
+import tests.test_add_drop
+
+
+class SlowClient(tests.fake_http.FakeClient):
+    async def request(self, method: str, url: str, **kwargs):
+        async def request():
+            response = await super(SlowClient, self).request(method, url, **kwargs)
+            if dict(kwargs.get("params") or ())["serno"] == "22222":
+                await asyncio.sleep(1)
+            return response
+
+        return await ntu_css.deadlines.bounded(request())
+
+
+class DeadlineTest(unittest.IsolatedAsyncioTestCase):
+    async def test_swap_rollback_runs_after_deadline(self):
+        http_client = SlowClient(tests.test_add_drop.course_selection_server(set()))
+        client = tests.test_add_drop.make_client(http_client)
+        with self.assertRaises(ntu_css.deadlines.DeadlineExceeded):
+            with ntu_css.deadlines.deadline(0.2):
+                await client.swap_course("11111", ntu_css.add_drop.Type1Course("22222"))
+        self.assertEqual(
+            tests.test_add_drop.sent(http_client),
+            [("del-cou", "11111"), ("add-cou", "22222"), ("add-cou", "11111")],
+        )
+
+    async def test_httpx_timeout_shrinks_to_deadline(self):
+        timeouts = []
+
+        def handler(request: httpx.Request):
+            timeouts.append(request.extensions["timeout"])
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), timeout=5
+        ) as client:
+            http_client = ntu_css.http.HttpxClient(client)
+            with ntu_css.deadlines.deadline(60):
+                await http_client.request("GET", "https://example.com/")
+            with ntu_css.deadlines.deadline(1):
+                await http_client.request("GET", "https://example.com/")
+        self.assertEqual(set(timeouts[0].values()), {5})
+        self.assertTrue(all(0 < value <= 1 for value in timeouts[1].values()))
+
+    async def test_retry_stops_before_sleeping_past_deadline(self):
+        attempts = 0
+
+        async def operation():
+            nonlocal attempts
+            attempts += 1
+            raise ntu_css.stage2.ErrorMessageInContentDivisionFromServer("額滿")
+
+        policy = ntu_css.retry.RetryPolicy(base_delay=1, jitter=0)
+        with self.assertRaises(ntu_css.stage2.ErrorMessageInContentDivisionFromServer):
+            with ntu_css.deadlines.deadline(0.5):
+                await policy.run(operation)
+        self.assertEqual(attempts, 1)
@@ -0,0 +1,44 @@
+import asyncio
+import unittest
+
+import ntu_css.lite_http
+
+
+class StaleConnectionTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.targets: list[bytes] = []
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            first = True
+            while request_line := await reader.readline():
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+                self.targets.append(request_line.split(b" ")[1].split(b"?")[0])
+                if not first:
+                    break
+                first = False
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.client = ntu_css.lite_http.LiteClient(base=f"http://127.0.0.1:{port}/")
+        await self.client.request("GET", "/coursetake2/coutake/mainscr")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_read_is_replayed_on_fresh_connection(self):
+        response = await self.client.request("GET", "/coursetake2/coutake/mainscr")
+        self.assertEqual(response.content(), b"ok")
+        self.assertEqual(len(self.targets), 3)
+
+    async def test_mutation_is_not_replayed(self):
+        with self.assertRaises((ConnectionError, asyncio.IncompleteReadError)):
+            await self.client.request(
+                "GET", "/coursetake2/coutake/add-cou", params={"serno": "97001"}
+            )
+        self.assertEqual(self.targets.count(b"/coursetake2/coutake/add-cou"), 1)
@@ -0,0 +1,75 @@
+import threading
+import unittest
+
+import httpx
+
+import ntu_css.http
+import ntu_css.sharding
+
+
+async def double(account: int, limiter: ntu_css.sharding.SharedRateLimiter):
+    if account % 7 == 0:
+        raise ValueError(account)
+    return account * 2
+
+
+async def padded(account: int, limiter: ntu_css.sharding.SharedRateLimiter):
+    return "x" * 4096
+
+
+def make_client(status_code: int):
+    limiter = ntu_css.sharding.shared_rate_limiter(
+        ["example.com"], rate=100.0, burst=10.0, failure_threshold=1
+    )
+    client = ntu_css.http.HttpxClient(
+        httpx.AsyncClient(
+            base_url="http://example.com/",
+            transport=httpx.MockTransport(lambda request: httpx.Response(status_code)),
+        )
+    )
+    return ntu_css.sharding.RateLimitedClient(client, limiter), limiter
+
+
+class RateLimitedClientTest(unittest.IsolatedAsyncioTestCase):
+    async def test_client_error_is_returned_unchanged(self):
+        client, limiter = make_client(404)
+        response = await client.request("GET", "/")
+        self.assertEqual(response.status(), 404)
+        self.assertTrue(limiter.healthy("example.com"))
+
+    async def test_server_error_marks_host_unhealthy(self):
+        for status_code in (429, 503):
+            client, limiter = make_client(status_code)
+            response = await client.request("GET", "/")
+            self.assertEqual(response.status(), status_code)
+            self.assertFalse(limiter.healthy("example.com"))
+
+
+class RunShardedTest(unittest.TestCase):
+    def setUp(self):
+        self.limiter = ntu_css.sharding.shared_rate_limiter(
+            ["example.com"], rate=100.0, burst=10.0
+        )
+
+    def test_all_accounts_are_yielded(self):
+        items = list(
+            ntu_css.sharding.run_sharded(range(50), double, self.limiter, processes=3)
+        )
+        self.assertEqual(sorted(item.account for item in items), list(range(50)))
+        for item in items:
+            if item.account % 7 == 0:
+                self.assertEqual(item.error, f"ValueError: {item.account}")
+                self.assertIsNone(item.result)
+            else:
+                self.assertEqual(item.result, item.account * 2)
+                self.assertIsNone(item.error)
+
+    def test_early_close_does_not_hang(self):
+        items = ntu_css.sharding.run_sharded(
+            range(500), padded, self.limiter, processes=2
+        )
+        next(items)
+        thread = threading.Thread(target=items.close)
+        thread.start()
+        thread.join(timeout=20)
+        self.assertFalse(thread.is_alive())
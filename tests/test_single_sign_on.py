@@ -0,0 +1,39 @@
+import unittest
+
+import ntu_css.http
+import ntu_css.results
+import ntu_css.single_sign_on
+import tests.fake_http
+
+INDEX_URL = "https://if177.aca.ntu.edu.tw/qcaureg/index.asp"
+
+
+def redirect_to(url: str):
+    return lambda method, request_url, params: tests.fake_http.FakeResponse(
+        "<html></html>", url
+    )
+
+
+class SessionBrokerTest(unittest.IsolatedAsyncioTestCase):
+    def test_default_client_has_no_cookies(self):
+        client = tests.fake_http.FakeClient(redirect_to(INDEX_URL))
+        client.set_cookies([ntu_css.http.Cookie("a", "b", "example.com", "/")])
+        self.assertEqual(client.cookies(), [])
+
+    async def test_reused_session_skips_credential_post(self):
+        session_broker = ntu_css.single_sign_on.SessionBroker({"user": []})
+        http_client = tests.fake_http.FakeClient(redirect_to(INDEX_URL))
+        client = ntu_css.results.Client(http_client, session_broker=session_broker)
+        await client.login("user", "password")
+        self.assertEqual([method for (method, _, _) in http_client.requests], ["GET"])
+        self.assertIn("user", session_broker.cookies)
+
+    async def test_failed_reused_session_is_discarded(self):
+        session_broker = ntu_css.single_sign_on.SessionBroker({"user": []})
+        http_client = tests.fake_http.FakeClient(
+            redirect_to("https://if177.aca.ntu.edu.tw/qcaureg/error.asp")
+        )
+        client = ntu_css.results.Client(http_client, session_broker=session_broker)
+        with self.assertRaises(AssertionError):
+            await client.login("user", "password")
+        self.assertNotIn("user", session_broker.cookies)